@@ -19,7 +19,7 @@ import json
 def gen_rec_label(input_path, out_label):
     with open(out_label, "w") as out_file:
         with open(input_path, "r") as f:
-            for line in f.readlines():
+            for line in f:
                 tmp = line.strip("\n").replace(" ", "").split(",")
                 img_path, label = tmp[0], tmp[1]
                 label = label.replace('"', "")
@@ -34,7 +34,7 @@ def gen_det_label(root_path, input_dir, out_label):
             with open(
                 os.path.join(input_dir, label_file), "r", encoding="utf-8-sig"
             ) as f:
-                for line in f.readlines():
+                for line in f:
                     tmp = line.strip("\n\r").replace("\xef\xbb\xbf", "").split(",")
                     points = tmp[:8]
                     s = []
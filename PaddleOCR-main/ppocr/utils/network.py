@@ -17,10 +17,14 @@ import sys
 import time
 import shutil
 import tarfile
+import threading
 import requests
 import os.path as osp
 import paddle.distributed as dist
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.util.retry import Retry
 
 from ppocr.utils.logging import get_logger
 
@@ -28,6 +32,25 @@ MODELS_DIR = os.path.join(
     os.environ.get("PADDLE_OCR_BASE_DIR", os.path.expanduser("~/.paddleocr/")), "models"
 )
 DOWNLOAD_RETRY_LIMIT = 3
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+# Files at least this large are fetched as DOWNLOAD_PARTS concurrent ranges
+DOWNLOAD_PARTS = 8
+DOWNLOAD_PARTS_MIN_SIZE = 64 << 20
+
+
+def _create_session():
+    # One pooled session for all downloads, so that consecutive requests to
+    # the same host reuse the connection instead of a new TCP/TLS handshake.
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_maxsize=2 * DOWNLOAD_PARTS, max_retries=Retry(total=3, backoff_factor=0.3)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = _create_session()
 
 
 def download_with_progressbar(url, save_path):
@@ -66,8 +89,40 @@ def _download(url, save_path):
                 "Download from {} failed. " "Retry limit reached".format(url)
             )
 
+        # For protecting download interrupted, download to
+        # tmp_file firstly, move tmp_file to save_path
+        # after download finished. A partial tmp_file left by an
+        # interrupted download is resumed with a Range request, guarded by
+        # If-Range so that a changed remote file is fetched from scratch.
+        tmp_file = save_path + ".tmp"
+        resume_size = osp.getsize(tmp_file) if osp.exists(tmp_file) else 0
+        validator = _load_validator(tmp_file) if resume_size > 0 else None
+        if resume_size > 0 and validator is None:
+            # Nothing to tell whether the partial file is still current
+            _remove_tmp(tmp_file)
+            resume_size = 0
+        if resume_size == 0:
+            try:
+                done = _download_parts(url, tmp_file)
+            except requests.exceptions.RequestException as e:
+                logger.info(
+                    "Downloading {} from {} failed {} times with exception {}".format(
+                        fname, url, retry_cnt, str(e)
+                    )
+                )
+                _remove_tmp(tmp_file)
+                time.sleep(1)
+                continue
+            if done:
+                _finish_tmp(tmp_file, save_path)
+                continue
+        headers = {"Accept-Encoding": "identity"}
+        if resume_size > 0:
+            headers["Range"] = "bytes={}-".format(resume_size)
+            headers["If-Range"] = validator
+
         try:
-            req = requests.get(url, stream=True)
+            req = _session.get(url, stream=True, headers=headers)
         except Exception as e:  # requests.exceptions.ConnectionError
             logger.info(
                 "Downloading {} from {} failed {} times with exception {}".format(
@@ -77,32 +132,200 @@ def _download(url, save_path):
             time.sleep(1)
             continue
 
-        if req.status_code != 200:
+        content_range = _parse_content_range(req.headers.get("content-range"))
+        if req.status_code == 416 or (
+            req.status_code == 206
+            and (content_range is None or content_range[0] != resume_size)
+        ):
+            # The partial file does not match the remote one, start over
+            req.close()
+            _remove_tmp(tmp_file)
+            continue
+        if req.status_code not in (200, 206):
+            req.close()
             raise RuntimeError(
                 "Downloading from {} failed with code "
                 "{}!".format(url, req.status_code)
             )
+        if req.status_code == 200:
+            resume_size = 0
+            _save_validator(tmp_file, req.headers)
 
-        # For protecting download interrupted, download to
-        # tmp_file firstly, move tmp_file to save_path
-        # after download finished
-        tmp_file = save_path + ".tmp"
         total_size = req.headers.get("content-length")
-        with open(tmp_file, "wb") as f:
-            if total_size:
-                with tqdm(total=(int(total_size) + 1023) // 1024) as pbar:
-                    for chunk in req.iter_content(chunk_size=1024):
-                        f.write(chunk)
-                        pbar.update(1)
-            else:
-                for chunk in req.iter_content(chunk_size=1024):
-                    if chunk:
-                        f.write(chunk)
-        shutil.move(tmp_file, save_path)
+        written = resume_size
+        try:
+            with open(tmp_file, "ab" if resume_size > 0 else "wb") as f:
+                if total_size:
+                    with tqdm(
+                        total=resume_size + int(total_size),
+                        initial=resume_size,
+                        unit="B",
+                        unit_scale=True,
+                    ) as pbar:
+                        for chunk in req.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                            written += len(chunk)
+                            pbar.update(len(chunk))
+                else:
+                    for chunk in req.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+        except requests.exceptions.RequestException as e:
+            logger.info(
+                "Downloading {} from {} interrupted {} times with exception {}".format(
+                    fname, url, retry_cnt, str(e)
+                )
+            )
+            time.sleep(1)
+            continue
+        finally:
+            req.close()
+        if total_size and written != resume_size + int(total_size):
+            logger.info(
+                "Downloading {} from {} interrupted {} times, got {} of {} bytes".format(
+                    fname, url, retry_cnt, written, resume_size + int(total_size)
+                )
+            )
+            continue
+        _finish_tmp(tmp_file, save_path)
 
     return save_path
 
 
+def _load_validator(tmp_file):
+    validator_file = tmp_file + ".validator"
+    if not osp.exists(validator_file):
+        return None
+    with open(validator_file, "r") as f:
+        return f.read() or None
+
+
+def _save_validator(tmp_file, headers):
+    # If-Range only accepts a strong ETag or a Last-Modified date
+    etag = headers.get("etag")
+    validator = etag if etag and not etag.startswith("W/") else None
+    validator = validator or headers.get("last-modified")
+    validator_file = tmp_file + ".validator"
+    if validator:
+        with open(validator_file, "w") as f:
+            f.write(validator)
+    elif osp.exists(validator_file):
+        os.remove(validator_file)
+
+
+def _remove_tmp(tmp_file):
+    for path in (tmp_file, tmp_file + ".validator"):
+        if osp.exists(path):
+            os.remove(path)
+
+
+def _finish_tmp(tmp_file, save_path):
+    shutil.move(tmp_file, save_path)
+    _remove_tmp(tmp_file)
+
+
+def _parse_content_range(value):
+    """
+    Parse a "bytes start-end/total" Content-Range header.
+
+    Returns (start, end, total) as ints, total being None for "*", or None
+    if the header is missing or malformed.
+    """
+    if not value or not value.startswith("bytes "):
+        return None
+    try:
+        span, total = value[len("bytes ") :].split("/")
+        start, end = span.split("-")
+        return int(start), int(end), None if total == "*" else int(total)
+    except ValueError:
+        return None
+
+
+def _download_parts(url, tmp_file):
+    """
+    Download url into tmp_file with concurrent Range requests.
+
+    Returns False and leaves no tmp_file behind if the file is too small,
+    the server does not support ranges or any part comes back incomplete,
+    so that the caller falls back to a single stream.
+    """
+    headers = {"Accept-Encoding": "identity"}
+    head = _session.head(url, allow_redirects=True, headers=headers)
+    total_size = int(head.headers.get("content-length", 0))
+    if (
+        head.status_code != 200
+        or head.headers.get("accept-ranges") != "bytes"
+        or total_size < DOWNLOAD_PARTS_MIN_SIZE
+    ):
+        return False
+    # request the parts from the final location, not through the redirects
+    url = head.url
+
+    with open(tmp_file, "wb") as f:
+        f.truncate(total_size)
+    _save_validator(tmp_file, head.headers)
+    validator = _load_validator(tmp_file)
+    if validator is not None:
+        # a part from a changed remote file comes back as 200 and fails
+        headers["If-Range"] = validator
+
+    part_size = (total_size + DOWNLOAD_PARTS - 1) // DOWNLOAD_PARTS
+    # Set when a part fails or the download is interrupted, so that the
+    # other parts stop within one chunk instead of finishing their ranges.
+    stop = threading.Event()
+    with tqdm(total=total_size, unit="B", unit_scale=True) as pbar:
+
+        def fetch(start):
+            end = min(start + part_size, total_size) - 1
+            part_headers = dict(headers, Range="bytes={}-{}".format(start, end))
+            written = 0
+            with _session.get(url, stream=True, headers=part_headers) as req:
+                content_range = _parse_content_range(req.headers.get("content-range"))
+                if req.status_code != 206 or content_range != (start, end, total_size):
+                    return False
+                with open(tmp_file, "r+b") as f:
+                    f.seek(start)
+                    for chunk in req.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if stop.is_set():
+                            return False
+                        f.write(chunk)
+                        written += len(chunk)
+                        pbar.update(len(chunk))
+            return written == end - start + 1
+
+        def fetch_or_stop(start):
+            try:
+                done = fetch(start)
+            except BaseException:
+                stop.set()
+                raise
+            if not done:
+                stop.set()
+            return done
+
+        executor = ThreadPoolExecutor(max_workers=DOWNLOAD_PARTS)
+        futures = [
+            executor.submit(fetch_or_stop, start)
+            for start in range(0, total_size, part_size)
+        ]
+        try:
+            results = [future.result() for future in futures]
+        except BaseException:
+            # same as shutdown(cancel_futures=True), which needs Python 3.9
+            stop.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+            _remove_tmp(tmp_file)
+            raise
+        executor.shutdown()
+
+    if not all(results):
+        _remove_tmp(tmp_file)
+        return False
+    return True
+
+
 def maybe_download(model_storage_directory, url):
     # using custom model
     tar_file_name_list = [".pdiparams", ".pdiparams.info", ".pdmodel"]
@@ -124,7 +347,7 @@ def maybe_download(model_storage_directory, url):
                     continue
                 file = tarObj.extractfile(member)
                 with open(os.path.join(model_storage_directory, filename), "wb") as f:
-                    f.write(file.read())
+                    shutil.copyfileobj(file, f, length=DOWNLOAD_CHUNK_SIZE)
         os.remove(tmp_path)
 
 
@@ -59,9 +59,11 @@ def get_check_global_params(mode):
     return check_params
 
 
+IMG_END = ("jpg", "bmp", "png", "jpeg", "rgb", "tif", "tiff", "gif", "pdf")
+
+
 def _check_image_file(path):
-    img_end = {"jpg", "bmp", "png", "jpeg", "rgb", "tif", "tiff", "gif", "pdf"}
-    return any([path.lower().endswith(e) for e in img_end])
+    return path.lower().endswith(IMG_END)
 
 
 def get_image_file_list(img_file, infer_list=None):
@@ -79,14 +81,14 @@ def get_image_file_list(img_file, infer_list=None):
         if img_file is None or not os.path.exists(img_file):
             raise Exception("not found any img file in {}".format(img_file))
 
-        img_end = {"jpg", "bmp", "png", "jpeg", "rgb", "tif", "tiff", "gif", "pdf"}
         if os.path.isfile(img_file) and _check_image_file(img_file):
             imgs_lists.append(img_file)
         elif os.path.isdir(img_file):
-            for single_file in os.listdir(img_file):
-                file_path = os.path.join(img_file, single_file)
-                if os.path.isfile(file_path) and _check_image_file(file_path):
-                    imgs_lists.append(file_path)
+            # scandir entries cache the file type, so no stat per file
+            with os.scandir(img_file) as entries:
+                for entry in entries:
+                    if _check_image_file(entry.name) and entry.is_file():
+                        imgs_lists.append(entry.path)
 
     if len(imgs_lists) == 0:
         raise Exception("not found any img file in {}".format(img_file))
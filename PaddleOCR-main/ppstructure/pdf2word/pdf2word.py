@@ -13,15 +13,18 @@
 # limitations under the License.
 
 import sys
+import shutil
 import tarfile
 import os
 import time
 import datetime
 import functools
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import platform
 import numpy as np
 from paddle.utils import try_import
+from tqdm import tqdm
 
 fitz = try_import("fitz")
 from PIL import Image
@@ -46,7 +49,7 @@ sys.path.insert(0, root)
 
 from ppstructure.predict_system import StructureSystem, save_structure_res
 from ppstructure.utility import parse_args, draw_structure_result
-from ppocr.utils.network import download_with_progressbar
+from ppocr.utils.network import DOWNLOAD_CHUNK_SIZE, download_with_progressbar
 from ppstructure.recovery.recovery_to_doc import sorted_layout_boxes, convert_info_docx
 
 # from ScreenShotWidget import ScreenShotWidget
@@ -331,7 +334,25 @@ class APP_Image2Doc(QWidget):
         self.setLayout(layout)
 
     def downloadModels(self, URLs):
+        model_path = os.path.join(root, "inference")
+        os.makedirs(model_path, exist_ok=True)
+
+        # download and unzip models concurrently, one archive per worker
+        with ThreadPoolExecutor(max_workers=len(URLs)) as executor:
+            # consume the results so that errors in a worker are raised here
+            list(
+                executor.map(
+                    self.downloadModel,
+                    URLs.values(),
+                    [model_path] * len(URLs),
+                    URLs.keys(),
+                )
+            )
+
+    def downloadModel(self, url, model_path, name):
         # using custom model
+        # Models are downloaded concurrently, so output goes through
+        # tqdm.write, which holds tqdm's lock and redraws the progress bars.
         tar_file_name_list = [
             "inference.pdiparams",
             "inference.pdiparams.info",
@@ -340,42 +361,50 @@ class APP_Image2Doc(QWidget):
             "model.pdiparams.info",
             "model.pdmodel",
         ]
-        model_path = os.path.join(root, "inference")
-        os.makedirs(model_path, exist_ok=True)
-
-        # download and unzip models
-        for name in URLs.keys():
-            url = URLs[name]
-            print("Try downloading file: {}".format(url))
-            tarname = url.split("/")[-1]
-            tarpath = os.path.join(model_path, tarname)
-            if os.path.exists(tarpath):
-                print("File have already exist. skip")
-            else:
-                try:
-                    download_with_progressbar(url, tarpath)
-                except Exception as e:
-                    print("Error occurred when downloading file, error message:")
-                    print(e)
+        storage_dir = os.path.join(model_path, name)
+        if any(
+            os.path.exists(os.path.join(storage_dir, prefix + ".pdiparams"))
+            and os.path.exists(os.path.join(storage_dir, prefix + ".pdmodel"))
+            for prefix in ("inference", "model")
+        ):
+            tqdm.write("Model {} have already been extracted. skip".format(name))
+            return
 
-            # unzip model tar
+        tqdm.write("Try downloading file: {}".format(url))
+        tarname = url.split("/")[-1]
+        tarpath = os.path.join(model_path, tarname)
+        if os.path.exists(tarpath):
+            tqdm.write("File have already exist. skip")
+        else:
             try:
-                with tarfile.open(tarpath, "r") as tarObj:
-                    storage_dir = os.path.join(model_path, name)
-                    os.makedirs(storage_dir, exist_ok=True)
-                    for member in tarObj.getmembers():
-                        filename = None
-                        for tar_file_name in tar_file_name_list:
-                            if tar_file_name in member.name:
-                                filename = tar_file_name
-                        if filename is None:
-                            continue
-                        file = tarObj.extractfile(member)
-                        with open(os.path.join(storage_dir, filename), "wb") as f:
-                            f.write(file.read())
+                download_with_progressbar(url, tarpath)
             except Exception as e:
-                print("Error occurred when unziping file, error message:")
-                print(e)
+                tqdm.write(
+                    "Error occurred when downloading file, error message:\n{}".format(e)
+                )
+
+        # unzip model tar
+        try:
+            with tarfile.open(tarpath, "r") as tarObj:
+                os.makedirs(storage_dir, exist_ok=True)
+                for member in tarObj.getmembers():
+                    filename = None
+                    for tar_file_name in tar_file_name_list:
+                        if tar_file_name in member.name:
+                            filename = tar_file_name
+                    if filename is None:
+                        continue
+                    file = tarObj.extractfile(member)
+                    # write to a temporary name first, so that an interrupted
+                    # unzip never leaves a truncated model file behind
+                    save_path = os.path.join(storage_dir, filename)
+                    with open(save_path + ".tmp", "wb") as f:
+                        shutil.copyfileobj(file, f, length=DOWNLOAD_CHUNK_SIZE)
+                    os.replace(save_path + ".tmp", save_path)
+        except Exception as e:
+            tqdm.write(
+                "Error occurred when unziping file, error message:\n{}".format(e)
+            )
 
     def initPredictor(self, lang="EN"):
         # init predictor args
@@ -0,0 +1,265 @@
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from ppocr.utils import network
+
+CONTENT = bytes(range(256)) * 391 + b"tail"
+ETAG = '"v1"'
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serves CONTENT at /data with Range, If-Range and a /redirect alias."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _send_empty(self, code, headers=()):
+        self.send_response(code)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _respond(self, send_body):
+        server = self.server
+        server.requests.append((self.command, self.path, dict(self.headers)))
+        if self.path == "/redirect":
+            self._send_empty(302, [("Location", "/data")])
+            return
+        if self.path != "/data":
+            self._send_empty(404)
+            return
+
+        data = server.content
+        byte_range = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if byte_range and server.support_ranges and if_range in (None, server.etag):
+            start, end = byte_range[len("bytes=") :].split("-")
+            start = int(start)
+            end = min(int(end) if end else len(data) - 1, len(data) - 1)
+            if start >= len(data):
+                self._send_empty(416, [("Content-Range", f"bytes */{len(data)}")])
+                return
+            body = data[start : end + 1 - server.short_parts]
+            self.send_response(206)
+            shift = server.content_range_shift
+            if start in server.bad_parts:
+                shift += 1
+            self.send_header(
+                "Content-Range", f"bytes {start + shift}-{end + shift}/{len(data)}"
+            )
+        else:
+            body = data
+            self.send_response(200)
+        if server.support_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body and byte_range and (server.slow_parts in ("all", start)):
+            self._write_slowly(body, start)
+        elif send_body:
+            self.wfile.write(body)
+
+    def _write_slowly(self, body, start):
+        # time.sleep is patched out by the server fixture
+        pause = threading.Event()
+        sent = 0
+        try:
+            for i in range(0, len(body), 256):
+                self.wfile.write(body[i : i + 256])
+                self.wfile.flush()
+                sent += len(body[i : i + 256])
+                pause.wait(0.02)
+        except OSError:
+            pass
+        finally:
+            self.server.sent[start] = sent
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(network.time, "sleep", lambda _: None)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+    httpd.content = CONTENT
+    httpd.etag = ETAG
+    httpd.support_ranges = True
+    httpd.content_range_shift = 0
+    httpd.short_parts = 0
+    httpd.bad_parts = set()
+    httpd.slow_parts = None
+    httpd.sent = {}
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.base_url = "http://127.0.0.1:{}".format(httpd.server_address[1])
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def save_path(tmp_path):
+    return str(tmp_path / "model.tar")
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def assert_downloaded(save_path):
+    assert read(save_path) == CONTENT
+    assert not os.path.exists(save_path + ".tmp")
+    assert not os.path.exists(save_path + ".tmp.validator")
+
+
+def range_gets(server):
+    return [
+        headers["Range"]
+        for command, _, headers in server.requests
+        if command == "GET" and "Range" in headers
+    ]
+
+
+def test_download_single_stream(server, save_path):
+    network._download(server.base_url + "/data", save_path)
+    assert_downloaded(save_path)
+    assert range_gets(server) == []
+
+
+def test_download_in_parts(server, save_path, monkeypatch):
+    monkeypatch.setattr(network, "DOWNLOAD_PARTS_MIN_SIZE", 0)
+    network._download(server.base_url + "/redirect", save_path)
+    assert_downloaded(save_path)
+    assert len(range_gets(server)) == network.DOWNLOAD_PARTS
+    # only the HEAD follows the redirect, the parts go to the final url
+    assert [r[0] for r in server.requests if r[1] == "/redirect"] == ["HEAD"]
+    for _, _, headers in server.requests:
+        assert headers.get("Accept-Encoding") == "identity"
+
+
+def test_download_in_parts_falls_back_without_range_support(
+    server, save_path, monkeypatch
+):
+    monkeypatch.setattr(network, "DOWNLOAD_PARTS_MIN_SIZE", 0)
+    server.support_ranges = False
+    network._download(server.base_url + "/data", save_path)
+    assert_downloaded(save_path)
+    assert range_gets(server) == []
+
+
+def test_download_in_parts_rejects_mismatched_content_range(
+    server, save_path, monkeypatch
+):
+    monkeypatch.setattr(network, "DOWNLOAD_PARTS_MIN_SIZE", 0)
+    server.content_range_shift = 1
+    network._download(server.base_url + "/data", save_path)
+    # every part is rejected and the single stream fallback fetches the file
+    assert_downloaded(save_path)
+    last = server.requests[-1]
+    assert last[0] == "GET" and "Range" not in last[2]
+
+
+def test_download_in_parts_rejects_short_part(server, save_path, monkeypatch):
+    monkeypatch.setattr(network, "DOWNLOAD_PARTS_MIN_SIZE", 0)
+    server.short_parts = 1
+    network._download(server.base_url + "/data", save_path)
+    assert_downloaded(save_path)
+    last = server.requests[-1]
+    assert last[0] == "GET" and "Range" not in last[2]
+
+
+def test_download_in_parts_stops_other_parts_on_failure(server, save_path, monkeypatch):
+    monkeypatch.setattr(network, "DOWNLOAD_PARTS_MIN_SIZE", 0)
+    monkeypatch.setattr(network, "DOWNLOAD_CHUNK_SIZE", 256)
+    part_size = (len(CONTENT) + network.DOWNLOAD_PARTS - 1) // network.DOWNLOAD_PARTS
+    server.slow_parts = 0
+    server.bad_parts = {part_size}
+    network._download(server.base_url + "/data", save_path)
+    assert_downloaded(save_path)
+    # the slow part was abandoned as soon as its neighbour failed, wait for
+    # the server to notice the closed connection
+    deadline = time.monotonic() + 5
+    while 0 not in server.sent and time.monotonic() < deadline:
+        threading.Event().wait(0.05)
+    assert server.sent[0] < part_size // 2
+
+
+def test_download_in_parts_interrupted(server, save_path, monkeypatch):
+    monkeypatch.setattr(network, "DOWNLOAD_PARTS_MIN_SIZE", 0)
+    monkeypatch.setattr(network, "DOWNLOAD_CHUNK_SIZE", 256)
+    server.slow_parts = "all"
+    timer = threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGINT))
+    start = time.monotonic()
+    timer.start()
+    with pytest.raises(KeyboardInterrupt):
+        network._download(server.base_url + "/data", save_path)
+    timer.join()
+    # a full part takes about a second to be served at this pace
+    assert time.monotonic() - start < 1
+    assert not os.path.exists(save_path)
+    assert not os.path.exists(save_path + ".tmp")
+    assert not os.path.exists(save_path + ".tmp.validator")
+
+
+def test_resume_with_matching_validator(server, save_path):
+    with open(save_path + ".tmp", "wb") as f:
+        f.write(CONTENT[:1000])
+    with open(save_path + ".tmp.validator", "w") as f:
+        f.write(ETAG)
+    network._download(server.base_url + "/data", save_path)
+    assert_downloaded(save_path)
+    assert range_gets(server) == ["bytes=1000-"]
+    assert server.requests[-1][2]["If-Range"] == ETAG
+
+
+def test_resume_restarts_when_remote_file_changed(server, save_path):
+    with open(save_path + ".tmp", "wb") as f:
+        f.write(b"x" * 1000)
+    with open(save_path + ".tmp.validator", "w") as f:
+        f.write('"v0"')
+    network._download(server.base_url + "/data", save_path)
+    assert_downloaded(save_path)
+
+
+def test_resume_restarts_without_validator(server, save_path):
+    with open(save_path + ".tmp", "wb") as f:
+        f.write(b"x" * 1000)
+    network._download(server.base_url + "/data", save_path)
+    assert_downloaded(save_path)
+    assert range_gets(server) == []
+
+
+def test_killed_parallel_download_restarts_after_416(server, save_path):
+    # An interrupted ranged download leaves a preallocated, sparse tmp file
+    with open(save_path + ".tmp", "wb") as f:
+        f.truncate(len(CONTENT))
+    with open(save_path + ".tmp.validator", "w") as f:
+        f.write(ETAG)
+    network._download(server.base_url + "/data", save_path)
+    assert_downloaded(save_path)
+    assert range_gets(server) == ["bytes={}-".format(len(CONTENT))]
+
+
+def test_download_error_code(server, save_path):
+    with pytest.raises(RuntimeError):
+        network._download(server.base_url + "/missing", save_path)
+    assert not os.path.exists(save_path)
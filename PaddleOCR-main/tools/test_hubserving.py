@@ -101,6 +101,8 @@ def main(args):
     image_file_list = get_image_file_list(args.image_dir)
     is_visualize = False
     headers = {"Content-type": "application/json"}
+    # reuse one keep-alive connection to the server for all requests
+    session = requests.Session()
     cnt = 0
     total_time = 0
     for image_file in image_file_list:
@@ -112,7 +114,7 @@ def main(args):
         # seed http request
         starttime = time.time()
         data = {"images": [cv2_to_base64(img)]}
-        r = requests.post(url=args.server_url, headers=headers, data=json.dumps(data))
+        r = session.post(url=args.server_url, headers=headers, data=json.dumps(data))
         elapse = time.time() - starttime
         total_time += elapse
         logger.info("Predict time of %s: %.3fs" % (image_file, elapse))